@@ -0,0 +1,260 @@
+"""Shared helpers for the example MCP servers."""
+from functools import lru_cache
+import hashlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Callable
+
+from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.auth import AccessToken, TokenVerifier
+from fastmcp.tools.tool import Tool, ToolResult
+from pydantic import PrivateAttr
+
+# Servers listen on all interfaces; get_host_ip() is only used to build URLs
+BIND_HOST = os.getenv("MCP_BIND_HOST", "0.0.0.0")
+
+logger = logging.getLogger("example-server")
+
+
+@lru_cache(maxsize=1)
+def get_host_ip() -> str:
+    """Get the IP address this host is reachable on, detected once per process"""
+    override = os.getenv("MCP_HOST_IP")
+    if override:
+        return override
+    try:
+        # Connecting a UDP socket sends no packets; it only selects the outbound interface
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(("8.8.8.8", 80))
+            return sock.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+
+
+def configure_logging():
+    """Configure stderr logging; MCP_LOG_LEVEL=DEBUG enables per-call tool logs"""
+    logging.basicConfig(
+        level=os.getenv("MCP_LOG_LEVEL", "WARNING").upper(),
+        format="[%(name)s] %(message)s",
+    )
+
+
+@lru_cache(maxsize=1024)
+def add(a: int, b: int) -> int:
+    """Add two numbers"""
+    logger.debug("add(%s, %s)", a, b)
+    return a + b
+
+
+@lru_cache(maxsize=1024)
+def multiply(a: int, b: int) -> int:
+    """Multiply two numbers"""
+    logger.debug("multiply(%s, %s)", a, b)
+    return a * b
+
+
+# JSON schemas for the shared tools, written out so registration does not
+# reflect over signatures. The MCP server validates call arguments against
+# them, so tools do not run a second pydantic validation per call
+_INT_PAIR_SCHEMA = {
+    "type": "object",
+    "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+    "required": ["a", "b"],
+    "additionalProperties": False,
+}
+_INT_RESULT_SCHEMA = {
+    "type": "object",
+    "properties": {"result": {"type": "integer"}},
+    "required": ["result"],
+    "x-fastmcp-wrap-result": True,
+}
+_EMPTY_SCHEMA = {"type": "object", "properties": {}}
+_OBJECT_RESULT_SCHEMA = {"type": "object", "additionalProperties": True}
+
+
+class SchemaTool(Tool):
+    """Tool with an explicit JSON schema that calls its function directly
+
+    The MCP server normally validates arguments against the schema first,
+    but skips that when the tool is missing from its cache. run() therefore
+    still rejects missing and unexpected names, and converts integral floats
+    such as 5.0, which JSON Schema accepts as integers, to int.
+    """
+
+    fn: Callable[..., Any]
+
+    async def run(self, arguments: dict[str, Any]) -> ToolResult:
+        """Call fn with the schema-validated arguments"""
+        properties = self.parameters["properties"]
+        missing = [name for name in self.parameters.get("required", ()) if name not in arguments]
+        if missing:
+            raise ToolError(f"Missing required arguments: {', '.join(missing)}")
+        unexpected = [name for name in arguments if name not in properties]
+        if unexpected:
+            raise ToolError(f"Unexpected arguments: {', '.join(unexpected)}")
+        for name, value in arguments.items():
+            if type(value) is float and properties.get(name, {}).get("type") == "integer":
+                arguments[name] = int(value)
+
+        result = self.fn(**arguments)
+        if self.output_schema.get("x-fastmcp-wrap-result"):
+            return ToolResult(content=str(result), structured_content={"result": result})
+        return ToolResult(structured_content=result)
+
+
+class StaticTool(Tool):
+    """Argument-less tool whose result is built once and returned on every call"""
+
+    value: dict[str, Any]
+    _result: ToolResult = PrivateAttr()
+
+    def model_post_init(self, context: Any) -> None:
+        super().model_post_init(context)
+        self._result = ToolResult(structured_content=self.value)
+
+    async def run(self, arguments: dict[str, Any]) -> ToolResult:
+        """Return the prebuilt result"""
+        if arguments:
+            raise ToolError(f"Unexpected arguments: {', '.join(arguments)}")
+        return self._result
+
+
+# Built once at import and reused by every app that registers them
+TOOLS = (
+    SchemaTool(
+        fn=add,
+        name="add",
+        description="Add two numbers",
+        parameters=_INT_PAIR_SCHEMA,
+        output_schema=_INT_RESULT_SCHEMA,
+    ),
+    SchemaTool(
+        fn=multiply,
+        name="multiply",
+        description="Multiply two numbers",
+        parameters=_INT_PAIR_SCHEMA,
+        output_schema=_INT_RESULT_SCHEMA,
+    ),
+)
+
+
+def register_tools(app: FastMCP, server_info: dict):
+    """Register the tools shared by all example servers on app"""
+    for tool in TOOLS:
+        app.add_tool(tool)
+    app.add_tool(StaticTool(
+        value=server_info,
+        name="get_server_info",
+        description="Get server information",
+        parameters=_EMPTY_SCHEMA,
+        output_schema=_OBJECT_RESULT_SCHEMA,
+    ))
+
+
+def signal_handler(sig, frame):
+    print("Exiting gracefully")
+    sys.exit(0)
+
+
+def install_signal_handlers():
+    """Exit cleanly on SIGTERM and SIGINT"""
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+
+
+def install_uvloop():
+    """Use uvloop for the asyncio event loop when it is available"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    uvloop.install()
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class HashedTokenVerifier(TokenVerifier):
+    """Static token table keyed by SHA-256 digest instead of plain text
+
+    Takes the same tokens mapping as fastmcp's StaticTokenVerifier: each
+    token maps to client_id, scopes and an optional expires_at.
+
+    Lookups hash the presented token once and probe the table by digest, so the
+    comparison cost no longer depends on how much of a guessed token matches.
+    """
+
+    def __init__(self, tokens: dict[str, dict], required_scopes: list[str] | None = None):
+        super().__init__(required_scopes=required_scopes)
+        self._hashed = {_token_digest(token): data for token, data in tokens.items()}
+
+    async def verify_token(self, token: str) -> AccessToken | None:
+        """Verify token against the hashed token table"""
+        token_data = self._hashed.get(_token_digest(token))
+        if token_data is None:
+            return None
+
+        expires_at = token_data.get("expires_at")
+        if expires_at is not None and expires_at < time.time():
+            return None
+
+        scopes = token_data.get("scopes", [])
+        if not set(self.required_scopes).issubset(scopes):
+            return None
+
+        return AccessToken(
+            token=token,
+            client_id=token_data["client_id"],
+            scopes=scopes,
+            expires_at=expires_at,
+            claims=token_data,
+        )
+
+
+class CachingTokenVerifier(TokenVerifier):
+    """Wrap a TokenVerifier and remember successful verifications for a TTL
+
+    FastMCP verifies the bearer token on every JSON-RPC request, so repeated
+    calls with the same token are served from an in-memory table keyed by
+    the token digest. Failed verifications are not cached.
+    """
+
+    def __init__(self, verifier: TokenVerifier, ttl: float = 300, maxsize: int = 1024):
+        super().__init__(
+            resource_server_url=verifier.resource_server_url,
+            required_scopes=verifier.required_scopes,
+        )
+        self._verifier = verifier
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._cache: dict[bytes, tuple[AccessToken, float]] = {}
+
+    async def verify_token(self, token: str) -> AccessToken | None:
+        """Verify token, reusing a cached result while it is still valid"""
+        key = _token_digest(token)
+        now = time.time()
+        cached = self._cache.get(key)
+        if cached is not None:
+            access_token, cached_until = cached
+            if now < cached_until:
+                return access_token
+            del self._cache[key]
+
+        access_token = await self._verifier.verify_token(token)
+        if access_token is None:
+            return None
+
+        cached_until = now + self._ttl
+        if access_token.expires_at is not None:
+            cached_until = min(cached_until, access_token.expires_at)
+        if len(self._cache) >= self._maxsize:
+            # Evict the oldest entry; dicts preserve insertion order
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = (access_token, cached_until)
+        return access_token
@@ -0,0 +1,75 @@
+"""Run the example MCP servers used for network discovery testing.
+
+Usage:
+    python3 discovery_server.py --mode bearer --port 8001
+    python3 discovery_server.py --mode all
+"""
+import argparse
+import multiprocessing
+import os
+
+# Discovery servers are always reached over HTTP
+os.environ["MCP_TRANSPORT"] = "http"
+
+from common import configure_logging, install_signal_handlers, install_uvloop
+import main
+import main_no_auth
+import oauth_server
+
+SERVERS = {
+    "none": main_no_auth,
+    "bearer": main,
+    "oauth": oauth_server,
+}
+
+
+def run(mode: str, port: int | None = None):
+    """Run a single example server in the current process"""
+    server = SERVERS[mode]
+    if port is None:
+        server.run_http()
+    else:
+        server.run_http(port)
+
+
+def run_all():
+    """Run every example server on its default port, one child process each
+
+    Children are forked after the server modules are imported, so fastmcp is
+    loaded once and shared copy-on-write instead of per process.
+    """
+    ctx = multiprocessing.get_context("fork")
+    processes = [ctx.Process(target=run, args=(mode,), name=mode) for mode in SERVERS]
+    # SIGTERM raises SystemExit like SIGINT, so the children are always reaped
+    install_signal_handlers()
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    finally:
+        started = [process for process in processes if process.pid is not None]
+        for process in started:
+            process.terminate()
+        for process in started:
+            process.join()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=[*SERVERS, "all"], default="all")
+    parser.add_argument("--port", type=int, help="Override the MCP port (single mode only)")
+    args = parser.parse_args()
+
+    configure_logging()
+    install_uvloop()
+    if args.mode == "all":
+        if args.port is not None:
+            parser.error("--port cannot be used with --mode all")
+        run_all()
+    else:
+        run(args.mode, args.port)
+
+
+if __name__ == "__main__":
+    main_cli()
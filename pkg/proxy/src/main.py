@@ -1,8 +1,16 @@
 from fastmcp import FastMCP
-from fastmcp.server.auth import StaticTokenVerifier
 import os
-import signal
-import sys
+from common import (
+    BIND_HOST,
+    CachingTokenVerifier,
+    HashedTokenVerifier,
+    configure_logging,
+    install_signal_handlers,
+    install_uvloop,
+    register_tools,
+)
+
+PORT = 8001
 
 # Transport mode: "stdio" or "http"
 transport = os.getenv("MCP_TRANSPORT", "stdio")
@@ -12,7 +20,7 @@ AUTH_TOKEN = os.getenv("MCP_AUTH_TOKEN", "mcp-example-token-12345")
 
 token_verifier = None
 if transport == "http":
-    token_verifier = StaticTokenVerifier(
+    token_verifier = HashedTokenVerifier(
         tokens={
             AUTH_TOKEN: {
                 "client_id": "mcp-example-client",
@@ -22,6 +30,7 @@ if transport == "http":
         },
         required_scopes=["read"]
     )
+    token_verifier = CachingTokenVerifier(token_verifier, ttl=300)
 
 # Create server
 server_name = "MCP Example Server with Auth" if transport == "http" else "MCP Example Server"
@@ -39,41 +48,25 @@ if transport == "http":
 
 app = FastMCP(server_name, auth=token_verifier) if token_verifier else FastMCP(server_name)
 
-@app.tool()
-def add(a: int, b: int) -> int:
-    """Add two numbers"""
-    print(f"[debug-server] add({a}, {b})")
-    return a + b
-
-@app.tool()
-def multiply(a: int, b: int) -> int:
-    """Multiply two numbers"""
-    print(f"[debug-server] multiply({a}, {b})")
-    return a * b
-
-@app.tool()
-def get_server_info() -> dict:
-    """Get server information"""
-    auth_required = transport == "http"
-    return {
-        "name": server_name,
-        "version": "1.0.0",
-        "description": "Example MCP server",
-        "auth_required": auth_required,
-        "auth_method": "Bearer token" if auth_required else None,
-        "token_format": "Authorization: Bearer <token>" if auth_required else None,
-        "expected_token": AUTH_TOKEN if auth_required else None,
-        "supported_protocols": ["2024-11-05"]
-    }
+register_tools(app, {
+    "name": server_name,
+    "version": "1.0.0",
+    "description": "Example MCP server",
+    "auth_required": transport == "http",
+    "auth_method": "Bearer token" if transport == "http" else None,
+    "token_format": "Authorization: Bearer <token>" if transport == "http" else None,
+    "expected_token": AUTH_TOKEN if transport == "http" else None,
+    "supported_protocols": ["2024-11-05"]
+})
 
-def signal_handler(sig, frame):
-    print("Exiting gracefully")
-    sys.exit(0)
+def run_http(port: int = PORT):
+    app.run(transport="streamable-http", host=BIND_HOST, port=port)
 
 if __name__ == "__main__":
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
+    configure_logging()
+    install_uvloop()
+    install_signal_handlers()
     if transport == "stdio":
         app.run(transport="stdio")
     else:
-        app.run(transport="streamable-http", host="127.0.0.1", port=8001)
+        run_http()
@@ -1,13 +1,48 @@
+from authlib.jose import JsonWebToken
 from fastmcp import FastMCP
+from fastmcp.server.auth import JWTVerifier
 import os
 import secrets
 import time
-from flask import Flask, request, jsonify, redirect, url_for
-from flask_cors import CORS
+from cachetools import TTLCache
+import orjson
+from starlette.requests import Request
+from starlette.responses import RedirectResponse, Response
+from common import (
+    BIND_HOST,
+    CachingTokenVerifier,
+    configure_logging,
+    get_host_ip,
+    install_uvloop,
+    register_tools,
+)
+
+# The OAuth endpoints are served by the MCP server's own HTTP app, so the
+# issuer follows whatever port that app listens on (see configure())
+MCP_PORT = 8004
+_ISSUER: str
+_PROTECTED_RESOURCE_BYTES: bytes
+_AUTH_SERVER_BYTES: bytes
+
+# Access tokens are HS256 JWTs so the MCP server validates them locally by
+# signature instead of looking them up in shared state
+JWT_SECRET = os.getenv("MCP_JWT_SECRET") or secrets.token_urlsafe(32)
+ACCESS_TOKEN_TTL = 3600
+_jwt = JsonWebToken(["HS256"])
+
+# The OAuth endpoints are open to any origin, so CORS is a constant header
+_CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+# Browsers preflight the token endpoint because client_secret_basic sends
+# an Authorization header
+_PREFLIGHT_HEADERS = {
+    **_CORS_HEADERS,
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type",
+    "Access-Control-Max-Age": "86400",
+}
 
-# OAuth Server Implementation
-oauth_app = Flask(__name__)
-CORS(oauth_app)
+def json_response(data, status_code: int = 200) -> Response:
+    return Response(orjson.dumps(data), status_code=status_code, headers=_CORS_HEADERS, media_type="application/json")
 
 # In-memory storage for demo purposes
 clients = {
@@ -19,78 +54,86 @@ clients = {
     }
 }
 
-authorization_codes = {}
-access_tokens = {}
+# Bounded store whose TTL matches the code lifetime
+authorization_codes = TTLCache(maxsize=4096, ttl=600)
 
 # MCP Server with OAuth protection
 transport = os.getenv("MCP_TRANSPORT", "stdio")
 
-if transport == "http":
-    # OAuth-protected MCP server
-    app = FastMCP("MCP OAuth Server", auth=None)  # We'll handle auth manually
-else:
-    app = FastMCP("MCP OAuth Server")
-
-@app.tool()
-def add(a: int, b: int) -> int:
-    """Add two numbers (OAuth protected)"""
-    print(f"[oauth-server] add({a}, {b})")
-    return a + b
-
-@app.tool()
-def multiply(a: int, b: int) -> int:
-    """Multiply two numbers (OAuth protected)"""
-    print(f"[oauth-server] multiply({a}, {b})")
-    return a * b
-
-@app.tool()
-def get_server_info() -> dict:
-    """Get server information"""
-    return {
-        "name": "MCP OAuth Server",
-        "version": "1.0.0",
-        "description": "OAuth 2.1 protected MCP server",
-        "auth_required": transport == "http",
-        "auth_method": "OAuth 2.1" if transport == "http" else None,
-        "supported_protocols": ["2024-11-05"]
-    }
-
-# OAuth endpoints
-@oauth_app.route('/.well-known/oauth-protected-resource', methods=['GET'])
-def protected_resource_metadata():
-    return jsonify({
-        "resource": "https://mcp.example.com",
-        "authorization_servers": ["http://localhost:8003"],
+app = FastMCP("MCP OAuth Server")
+
+register_tools(app, {
+    "name": "MCP OAuth Server",
+    "version": "1.0.0",
+    "description": "OAuth 2.1 protected MCP server",
+    "auth_required": transport == "http",
+    "auth_method": "OAuth 2.1" if transport == "http" else None,
+    "supported_protocols": ["2024-11-05"]
+})
+
+def configure(port: int = MCP_PORT):
+    """Derive the issuer, OAuth metadata and token verifier from the served port"""
+    global _ISSUER, _PROTECTED_RESOURCE_BYTES, _AUTH_SERVER_BYTES
+    _ISSUER = f"http://{get_host_ip()}:{port}"
+
+    # OAuth metadata is fixed once the port is known, so serialize it once
+    _PROTECTED_RESOURCE_BYTES = orjson.dumps({
+        # Must match resource_server_url below, which the 401s point at
+        "resource": _ISSUER,
+        "authorization_servers": [_ISSUER],
         "scopes": ["read", "write"],
-        "resource_documentation": "http://localhost:8003/docs"
+        "resource_documentation": f"{_ISSUER}/docs"
     })
 
-@oauth_app.route('/.well-known/oauth-authorization-server', methods=['GET'])
-def authorization_server_metadata():
-    return jsonify({
-        "issuer": "http://localhost:8003",
-        "authorization_endpoint": "http://localhost:8003/oauth/authorize",
-        "token_endpoint": "http://localhost:8003/oauth/token",
-        "jwks_uri": "http://localhost:8003/.well-known/jwks.json",
+    _AUTH_SERVER_BYTES = orjson.dumps({
+        "issuer": _ISSUER,
+        "authorization_endpoint": f"{_ISSUER}/oauth/authorize",
+        "token_endpoint": f"{_ISSUER}/oauth/token",
         "scopes_supported": ["read", "write"],
         "response_types_supported": ["code"],
         "grant_types_supported": ["authorization_code", "refresh_token"],
         "token_endpoint_auth_methods_supported": ["client_secret_basic"]
     })
 
-@oauth_app.route('/oauth/authorize', methods=['GET'])
-def authorize():
-    client_id = request.args.get('client_id')
-    redirect_uri = request.args.get('redirect_uri')
-    scope = request.args.get('scope', '')
-    state = request.args.get('state', '')
+    if transport == "http":
+        # OAuth-protected MCP server
+        token_verifier = JWTVerifier(
+            public_key=JWT_SECRET,
+            algorithm="HS256",
+            issuer=_ISSUER,
+            required_scopes=["read"],
+            # Adds resource_metadata to the 401 WWW-Authenticate header so
+            # clients can discover the authorization server
+            resource_server_url=_ISSUER
+        )
+        app.auth = CachingTokenVerifier(token_verifier, ttl=300)
+
+configure()
+
+# OAuth endpoints
+@app.custom_route('/.well-known/oauth-protected-resource', methods=['GET'])
+async def protected_resource_metadata(request: Request) -> Response:
+    return Response(_PROTECTED_RESOURCE_BYTES, headers=_CORS_HEADERS, media_type="application/json")
+
+@app.custom_route('/.well-known/oauth-authorization-server', methods=['GET'])
+async def authorization_server_metadata(request: Request) -> Response:
+    return Response(_AUTH_SERVER_BYTES, headers=_CORS_HEADERS, media_type="application/json")
+
+@app.custom_route('/oauth/authorize', methods=['GET'])
+async def authorize(request: Request) -> Response:
+    client_id = request.query_params.get('client_id')
+    redirect_uri = request.query_params.get('redirect_uri')
+    state = request.query_params.get('state', '')
 
     if client_id not in clients:
-        return jsonify({"error": "invalid_client"}), 400
+        return json_response({"error": "invalid_client"}, 400)
 
     client = clients[client_id]
     if redirect_uri not in client['redirect_uris']:
-        return jsonify({"error": "invalid_redirect_uri"}), 400
+        return json_response({"error": "invalid_redirect_uri"}, 400)
+
+    # Default to the client's registered scopes when none are requested
+    scope = request.query_params.get('scope') or " ".join(client['scopes'])
 
     # For demo, auto-approve
     code = secrets.token_urlsafe(32)
@@ -103,78 +146,74 @@ def authorize():
     }
 
     redirect_url = f"{redirect_uri}?code={code}&state={state}"
-    return redirect(redirect_url)
+    return RedirectResponse(redirect_url, status_code=302, headers=_CORS_HEADERS)
 
-@oauth_app.route('/oauth/token', methods=['POST'])
-def token():
-    grant_type = request.form.get('grant_type')
-    code = request.form.get('code')
-    redirect_uri = request.form.get('redirect_uri')
-    client_id = request.form.get('client_id')
+@app.custom_route('/oauth/token', methods=['POST'])
+async def token(request: Request) -> Response:
+    form = await request.form()
+    grant_type = form.get('grant_type')
+    code = form.get('code')
+    redirect_uri = form.get('redirect_uri')
+    client_id = form.get('client_id')
 
     if grant_type != 'authorization_code':
-        return jsonify({"error": "unsupported_grant_type"}), 400
+        return json_response({"error": "unsupported_grant_type"}, 400)
 
-    if code not in authorization_codes:
-        return jsonify({"error": "invalid_grant"}), 400
+    # Codes are single use: take the entry out in one lookup, so a failed
+    # exchange also burns the code
+    auth_code = authorization_codes.pop(code, None)
+    if auth_code is None:
+        return json_response({"error": "invalid_grant"}, 400)
 
-    auth_code = authorization_codes[code]
     if auth_code['client_id'] != client_id:
-        return jsonify({"error": "invalid_client"}), 400
+        return json_response({"error": "invalid_client"}, 400)
 
     if auth_code['redirect_uri'] != redirect_uri:
-        return jsonify({"error": "invalid_redirect_uri"}), 400
+        return json_response({"error": "invalid_redirect_uri"}, 400)
 
-    if time.time() > auth_code['expires_at']:
-        return jsonify({"error": "code_expired"}), 400
+    # Read the clock once for both the expiry check and the token claims
+    now = int(time.time())
+    if now > auth_code['expires_at']:
+        return json_response({"error": "code_expired"}, 400)
 
     # Generate tokens
-    access_token = secrets.token_urlsafe(32)
-    refresh_token = secrets.token_urlsafe(32)
-
-    access_tokens[access_token] = {
+    access_token = _jwt.encode({"alg": "HS256"}, {
+        "iss": _ISSUER,
+        "sub": client_id,
         "client_id": client_id,
         "scope": auth_code['scope'],
-        "expires_at": time.time() + 3600  # 1 hour
-    }
-
-    # Clean up used code
-    del authorization_codes[code]
+        "iat": now,
+        "exp": now + ACCESS_TOKEN_TTL
+    }, JWT_SECRET).decode()
+    refresh_token = secrets.token_urlsafe(32)
 
-    return jsonify({
+    return json_response({
         "access_token": access_token,
         "token_type": "Bearer",
-        "expires_in": 3600,
+        "expires_in": ACCESS_TOKEN_TTL,
         "refresh_token": refresh_token,
         "scope": auth_code['scope']
     })
 
-def verify_token(token):
-    if token not in access_tokens:
-        return None
+async def preflight(request: Request) -> Response:
+    return Response(status_code=204, headers=_PREFLIGHT_HEADERS)
 
-    token_data = access_tokens[token]
-    if time.time() > token_data['expires_at']:
-        del access_tokens[token]
-        return None
+for _path in (
+    '/.well-known/oauth-protected-resource',
+    '/.well-known/oauth-authorization-server',
+    '/oauth/authorize',
+    '/oauth/token',
+):
+    app.custom_route(_path, methods=['OPTIONS'])(preflight)
 
-    return token_data
+def run_http(port: int = MCP_PORT):
+    configure(port)
+    app.run(transport="streamable-http", host=BIND_HOST, port=port)
 
 if __name__ == "__main__":
+    configure_logging()
+    install_uvloop()
     if transport == "stdio":
         app.run(transport="stdio")
     else:
-        # Start both OAuth server and MCP server
-        import threading
-
-        def run_oauth():
-            oauth_app.run(host="127.0.0.1", port=8003, debug=False)
-
-        def run_mcp():
-            app.run(transport="streamable-http", host="127.0.0.1", port=8004)
-
-        oauth_thread = threading.Thread(target=run_oauth)
-        oauth_thread.daemon = True
-        oauth_thread.start()
-
-        run_mcp()
\ No newline at end of file
+        run_http()
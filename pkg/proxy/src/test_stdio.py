@@ -1,34 +1,70 @@
 #!/usr/bin/env python3
+import os
 import sys
-import json
+import orjson
+
+READ_SIZE = 65536
+
+# Per-frame diagnostics on stderr; off unless MCP_STDIO_DEBUG=1
+DEBUG = os.getenv("MCP_STDIO_DEBUG") == "1"
+
+# Responses are fixed apart from the id and the echoed frame, which is
+# already valid JSON and is embedded as-is instead of being re-encoded.
+# The fixed parts are joined around them, so no format string is parsed
+ECHO_PREFIX = b'{"jsonrpc":"2.0","id":'
+ECHO_RESULT = b',"result":{"echo":'
+ECHO_SUFFIX = b'}}\n'
+NULL_ID = b'null'
+INVALID_JSON_RESPONSE = b'{"error":"Invalid JSON"}\n'
+
+def write_all(fd, data):
+    """Write data to fd with os.write, retrying on short writes"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def handle_frame(frame, stdout_fd):
+    frame = frame.strip()
+    if not frame:
+        return
+    if DEBUG:
+        print(f"Received: {frame.decode(errors='replace')}", file=sys.stderr, flush=True)
+    try:
+        request = orjson.loads(frame)
+        # Echo back the request as response
+        request_id = request.get("id") if isinstance(request, dict) else None
+        id_bytes = NULL_ID if request_id is None else orjson.dumps(request_id)
+        write_all(stdout_fd, b"".join((ECHO_PREFIX, id_bytes, ECHO_RESULT, frame, ECHO_SUFFIX)))
+        if DEBUG:
+            print("Sent response", file=sys.stderr, flush=True)
+    except orjson.JSONDecodeError as e:
+        if DEBUG:
+            print(f"JSON error: {e}", file=sys.stderr, flush=True)
+        write_all(stdout_fd, INVALID_JSON_RESPONSE)
 
 def main():
-    print("Test script started", file=sys.stderr)
-    sys.stderr.flush()
+    if DEBUG:
+        print("Test script started", file=sys.stderr, flush=True)
+    # Newline-delimited JSON-RPC frames, read and written directly on the
+    # file descriptors: one read(2) per chunk and one write(2) per response
+    stdin_fd = sys.stdin.fileno()
+    stdout_fd = sys.stdout.fileno()
     try:
-        # Read all input at once
-        input_data = sys.stdin.read()
-        print(f"Received: {input_data}", file=sys.stderr)
-        sys.stderr.flush()
-        try:
-            request = json.loads(input_data)
-            # Echo back the request as response
-            response = {
-                "jsonrpc": "2.0",
-                "id": request.get("id"),
-                "result": {"echo": request}
-            }
-            print(json.dumps(response))
-            sys.stdout.flush()
-            print(f"Sent response", file=sys.stderr)
-            sys.stderr.flush()
-        except json.JSONDecodeError as e:
-            print(f"JSON error: {e}", file=sys.stderr)
-            print(json.dumps({"error": "Invalid JSON"}))
-            sys.stdout.flush()
+        # A read may hold several frames or end mid-frame; handle every
+        # complete frame and carry the partial tail over to the next read
+        buf = bytearray()
+        while (chunk := os.read(stdin_fd, READ_SIZE)):
+            buf += chunk
+            start = 0
+            while (end := buf.find(b"\n", start)) != -1:
+                handle_frame(buf[start:end], stdout_fd)
+                start = end + 1
+            del buf[:start]
+        # The last frame may not be newline-terminated
+        handle_frame(buf, stdout_fd)
     except Exception as e:
         print(f"Exception: {e}", file=sys.stderr)
         sys.stderr.flush()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()